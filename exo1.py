@@ -1,17 +1,51 @@
-import requests  
-from bs4 import BeautifulSoup  
-from urllib.parse import urljoin 
-import sqlite3  
-import json 
-import os  
+import requests
+import requests_cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup
+import soupsieve as sv
+from urllib.parse import urljoin
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+import sqlite3
+import orjson
+import os
 
 URL = "https://books.toscrape.com/"
 
+# Sélecteurs CSS compilés une seule fois : évite de re-parser la chaîne du
+# sélecteur à chaque appel dans la boucle des livres
+_SEL_PRODUCT = sv.compile('article.product_pod')
+_SEL_PRICE = sv.compile('.price_color')
+_SEL_STOCK = sv.compile('.instock.availability')
+
+# Session partagée avec keep-alive + cache HTTP persistant : les pages déjà
+# téléchargées sont relues depuis http_cache.sqlite (revalidation
+# ETag/Last-Modified incluse) au lieu d'être re-téléchargées à chaque run
+SESSION = requests_cache.CachedSession(
+    'http_cache',
+    backend='sqlite',
+    expire_after=timedelta(hours=24),
+    allowable_methods=('GET',)
+)
+_adapter = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.3,
+                      status_forcelist=[429, 500, 502, 503, 504])
+)
+SESSION.mount('http://', _adapter)
+SESSION.mount('https://', _adapter)
+SESSION.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept-Encoding': 'gzip, deflate'
+})
+
 # Fonction utilitaire pour récupérer le contenu d'une URL
 def _get_soup(url):
-    resp = requests.get(url)
+    resp = SESSION.get(url, timeout=10)
     resp.raise_for_status()
-    return BeautifulSoup(resp.content, 'html.parser')
+    return BeautifulSoup(resp.content, 'lxml')
 
 # Fonction pour scraper une page de liste de livres
 def scrape_list_page(list_url):
@@ -21,7 +55,7 @@ def scrape_list_page(list_url):
     rating_map = {'One': 1, 'Two': 2, 'Three': 3, 'Four': 4, 'Five': 5}
 
     # Sélectionne tous les éléments <article> ayant la classe 'product_pod'
-    for article in soup.select('article.product_pod'):
+    for article in _SEL_PRODUCT.select(soup):
         a = article.find('h3').find('a')
         title = a.get('title')  
         href = a.get('href') 
@@ -29,11 +63,11 @@ def scrape_list_page(list_url):
         detail_url = urljoin(list_url, href)
 
         # Récupère le prix
-        price_tag = article.select_one('.price_color')  
+        price_tag = _SEL_PRICE.select_one(article)  
         price = price_tag.get_text(strip=True) if price_tag else ''
 
         # Récupère la disponibilité (stock)
-        stock_tag = article.select_one('.instock.availability')  
+        stock_tag = _SEL_STOCK.select_one(article)  
         stock = stock_tag.get_text(strip=True) if stock_tag else ''  
 
         # Récupère la notation (star-rating)
@@ -84,9 +118,23 @@ def scrape_detail(detail_url):
     return {'description': desc, 'category': cat}
 
 # Fonction pour créer la base de données et la table
-def create_db(db_path='books.db'):
-    conn = sqlite3.connect(db_path)  
-    cur = conn.cursor()  
+# 'bulk=True' relâche encore la durabilité pendant un chargement initial
+# complet (journal en mémoire, pas de fsync) : à réserver aux rebuilds
+def create_db(db_path='books.db', bulk=False):
+    conn = sqlite3.connect(db_path)
+    cur = conn.cursor()
+
+    # PRAGMAs orientés chargement : WAL évite le journal rollback,
+    # synchronous=NORMAL supprime les fsync superflus, et on élargit le
+    # cache de pages (64 Mo) + mmap (256 Mo)
+    cur.execute('PRAGMA journal_mode=WAL')
+    cur.execute('PRAGMA synchronous=NORMAL')
+    cur.execute('PRAGMA temp_store=MEMORY')
+    cur.execute('PRAGMA cache_size=-65536')
+    cur.execute('PRAGMA mmap_size=268435456')
+    if bulk:
+        cur.execute('PRAGMA synchronous=OFF')
+        cur.execute('PRAGMA journal_mode=MEMORY')
     # Exécute la commande SQL pour créer la table
     # 'IF NOT EXISTS' évite une erreur si la table existe déjà
     # 'detail_url' est 'UNIQUE' pour empêcher les doublons de livres
@@ -102,61 +150,76 @@ def create_db(db_path='books.db'):
         detail_url TEXT UNIQUE
     )
     ''')
+    # Index sur les colonnes de filtre habituelles : permet un parcours
+    # d'index au lieu d'un scan complet de la table
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_books_rating ON books(rating)')
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_books_category ON books(category)')
     conn.commit()
     return conn  
 
-# Fonction pour insérer ou mettre à jour un livre dans la BDD
-def insert_book(conn, book):
-    cur = conn.cursor()
-    cur.execute('''
-    INSERT OR REPLACE INTO books (title, price, rating, stock, description, category, detail_url)
-    VALUES (?, ?, ?, ?, ?, ?, ?)
-    ''', (
-        # Fournit les valeurs dans l'ordre des '?'
-        book.get('title'),
-        book.get('price'),
-        book.get('rating'),
-        book.get('stock'),
-        book.get('description'),
-        book.get('category'),
-        book.get('detail_url')
-    ))
-    conn.commit()  
-
 # Fonction principale pour scraper une page de liste et remplir la BDD
 def populate_db_from_page(db_path, list_url):
-    conn = create_db(db_path) 
-    items = scrape_list_page(list_url)  
-    
-    # Pour chaque livre trouvé sur la page de liste
-    for it in items:
-        # scrape sa page de détail pour obtenir la description et la catégorie
-        details = scrape_detail(it['detail_url'])
+    conn = create_db(db_path)
+    items = scrape_list_page(list_url)
+
+    # Les pages de détail sont indépendantes : on les télécharge en parallèle
+    # (le GIL est relâché pendant l'attente réseau, la session partagée
+    # fournit les connexions poolées aux threads)
+    with ThreadPoolExecutor(max_workers=16) as ex:
+        details_iter = ex.map(scrape_detail, [it['detail_url'] for it in items])
+
         # Fusionne les deux dictionnaires (infos de liste + infos de détail)
-        book = {**it, **details}
-        # Insère le livre complet dans la base de données
-        insert_book(conn, book)
-        
+        books = [{**it, **details} for it, details in zip(items, details_iter)]
+
+    # Insère tous les livres en une seule transaction : un seul fsync au
+    # commit au lieu d'un par ligne
+    rows = [
+        (b.get('title'), b.get('price'), b.get('rating'), b.get('stock'),
+         b.get('description'), b.get('category'), b.get('detail_url'))
+        for b in books
+    ]
+    # Sur un chargement initial (table vide), un INSERT simple évite la
+    # vérification d'unicité du REPLACE ; executemany prépare le statement
+    # une seule fois et ne fait que lier les N lignes
+    table_empty = conn.execute('SELECT NOT EXISTS (SELECT 1 FROM books)').fetchone()[0]
+    verb = 'INSERT' if table_empty else 'INSERT OR REPLACE'
+
+    conn.execute('BEGIN')
+    conn.executemany(f'''
+    {verb} INTO books (title, price, rating, stock, description, category, detail_url)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', rows)
+    conn.commit()
+
     conn.close()  # Ferme la connexion à la BDD une fois terminé
 
-# Fonction pour interroger la base de données et récupérer des livres
-def query_books(db_path, where_clause=None, params=(), limit=None):
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    cur = conn.cursor()
+# Fonction interne pour construire la requête SELECT avec WHERE/LIMIT optionnels
+def _build_select(where_clause=None, params=(), limit=None):
     sql = 'SELECT title, price, rating, stock, description, category, detail_url FROM books'
-    
+
     # Ajoute dynamiquement la clause WHERE si elle est fournie
     if where_clause:
-        sql += ' WHERE ' + where_clause  
-        
+        sql += ' WHERE ' + where_clause
+
     # Ajoute dynamiquement la clause LIMIT si elle est fournie
+    # (paramétrée : même texte SQL quel que soit le limit, donc le statement
+    # compilé est réutilisable, et aucun risque d'injection)
     if limit:
-        sql += ' LIMIT %d' % int(limit)  
-    
+        sql += ' LIMIT ?'
+        params = (*params, int(limit))
+
+    return sql, params
+
+# Fonction pour interroger la base de données et récupérer des livres
+def query_books(db_path, where_clause=None, params=(), limit=None):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    cur = conn.cursor()
+    sql, params = _build_select(where_clause, params, limit)
+
     # Exécute la requête SQL (en passant les paramètres 'params' pour la clause WHERE)
     cur.execute(sql, params)
-    rows = cur.fetchall()  
+    rows = cur.fetchall()
     
     # Convertit la liste d'objets 'sqlite3.Row' en une liste de dictionnaires Python standards
     result = [dict(r) for r in rows]
@@ -164,25 +227,42 @@ def query_books(db_path, where_clause=None, params=(), limit=None):
     return result  
 
 # Fonction pour exporter un fichier JSON à partir des résultats de la BDD
+# L'export est streamé depuis le curseur avec orjson : chaque ligne est
+# sérialisée et écrite au fil de l'eau, la mémoire reste constante quelle
+# que soit la taille du catalogue
 def export_books_json(db_path, out_path='books.json', where_clause=None, params=(), limit=None):
-    # Réutilise la fonction query_books pour obtenir les données
-    data = query_books(db_path, where_clause=where_clause, params=params, limit=limit)
-    with open(out_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-        
-    return data  
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    cur = conn.cursor()
+    sql, params = _build_select(where_clause, params, limit)
+    cur.execute(sql, params)
+
+    with open(out_path, 'wb') as f:
+        f.write(b'[')
+        first = True
+        for row in cur:
+            if not first:
+                f.write(b',\n')
+            f.write(orjson.dumps(dict(row), option=orjson.OPT_INDENT_2))
+            first = False
+        f.write(b']')
+
+    conn.close()
+    return out_path
 
 # Ce bloc n'est exécuté que si le script est lancé directement
 if __name__ == '__main__':
     # Définit le chemin du fichier de BDD dans le même répertoire que ce script
     db_file = os.path.join(os.path.dirname(__file__), 'books.db')
-    
-    # Étape 1: Scrape la page d'accueil (URL) et peuple la base de données (db_file)
-    populate_db_from_page(db_file, URL)
-    
-    # Étape 2: Interroge la BDD pour obtenir un échantillon de 10 livres
-    sample = query_books(db_file, limit=10)
-    print('Sample rows:', len(sample))  # Affiche le nombre de lignes récupérées
-    
-    # Étape 3: Exporte *tous* les livres de la BDD vers un fichier 'books.json'
-    export_books_json(db_file, os.path.join(os.path.dirname(__file__), 'books.json'))
\ No newline at end of file
+
+    # La session est fermée proprement à la fin grâce au 'with'
+    with SESSION:
+        # Étape 1: Scrape la page d'accueil (URL) et peuple la base de données (db_file)
+        populate_db_from_page(db_file, URL)
+
+        # Étape 2: Interroge la BDD pour obtenir un échantillon de 10 livres
+        sample = query_books(db_file, limit=10)
+        print('Sample rows:', len(sample))  # Affiche le nombre de lignes récupérées
+
+        # Étape 3: Exporte *tous* les livres de la BDD vers un fichier 'books.json'
+        export_books_json(db_file, os.path.join(os.path.dirname(__file__), 'books.json'))
\ No newline at end of file
@@ -1,34 +1,54 @@
 import os
 import hashlib
-import requests
+import asyncio
+import aiohttp
+from collections import Counter
+from pathlib import Path
 from bs4 import BeautifulSoup
+import soupsieve as sv
 import networkx as nx
-import json as _json
 
 BASE_URL = "https://quotes.toscrape.com"
 CACHE_DIR = "cache_html"
 
-# Fonction utilitaire pour récupérer le contenu d'une URL
-def fetch_with_cache(url):
-    os.makedirs(CACHE_DIR, exist_ok=True)
-    key = hashlib.sha1(url.encode("utf-8")).hexdigest()
-    cache_path = os.path.join(CACHE_DIR, key + ".html")
+# Nombre maximum de requêtes simultanées (politesse envers le serveur)
+MAX_CONCURRENCY = 10
+
+# Sélecteurs CSS compilés une seule fois : évite de re-parser la chaîne du
+# sélecteur à chaque citation
+_SEL_QUOTE = sv.compile(".quote")
+_SEL_AUTHOR_LINK = sv.compile("a[href^='/author/']")
+_SEL_TAGS = sv.compile(".tags a.tag")
+
+# Fonction utilitaire pour récupérer le contenu d'une URL (asynchrone)
+async def fetch_with_cache(session, url):
+    # BLAKE2b (16 octets) est plus rapide que SHA1 et suffit comme clé de
+    # fichier (aucun besoin cryptographique ici) ; les fichiers sont répartis
+    # dans 256 sous-répertoires pour éviter un répertoire à milliers d'entrées
+    key = hashlib.blake2b(url.encode("utf-8"), digest_size=16).hexdigest()
+    shard_dir = os.path.join(CACHE_DIR, key[:2])
+    os.makedirs(shard_dir, exist_ok=True)
+    cache_path = os.path.join(shard_dir, key + ".html")
 
     if os.path.exists(cache_path):
-        with open(cache_path, "rb") as f:
-            html = f.read()
+        # Lecture en un seul syscall (les fichiers sont petits et locaux)
+        html = Path(cache_path).read_bytes()
     else:
-        resp = requests.get(url)
-        resp.raise_for_status()
-        html = resp.content
-        with open(cache_path, "wb") as f:
+        async with session.get(url) as resp:
+            resp.raise_for_status()
+            html = await resp.read()
+        # Écriture bufferisée puis renommage atomique : un Ctrl-C en pleine
+        # écriture ne laisse jamais de fichier de cache corrompu
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, "wb", buffering=1024 * 1024) as f:
             f.write(html)
+        os.replace(tmp_path, cache_path)
 
-    return BeautifulSoup(html, "html.parser")
+    return BeautifulSoup(html, "lxml")
 
-# Fonction pour obtenir les détails d'un auteur
-def get_author_details(author_url):
-    soup = fetch_with_cache(author_url)
+# Fonction pour obtenir les détails d'un auteur (asynchrone)
+async def get_author_details(session, author_url):
+    soup = await fetch_with_cache(session, author_url)
     name_tag = soup.find("h3", class_="author-title")
     name = name_tag.text.strip() if name_tag else None
 
@@ -53,47 +73,65 @@ def get_author_details(author_url):
         "url": author_url
     }
 
-# Fonction principale pour scraper le site et exporter les données
-def scrape_and_export(base_url=BASE_URL, out_prefix="quotes_graph"):
-    authors_cache = {}   
-    quotes_data = []    
-
-    page_url = base_url
-    while page_url:
-        print(f"Scraping page: {page_url}")
-        soup = fetch_with_cache(page_url)
-
-        quote_nodes = soup.select(".quote")
-        for qnode in quote_nodes:
-            text_tag = qnode.find("span", class_="text")
-            quote_text = text_tag.text.strip() if text_tag else ""
-
-            author_tag = qnode.find("small", class_="author")
-            author_name = author_tag.text.strip() if author_tag else "Unknown"
-
-            author_link_tag = qnode.select_one("a[href^='/author/']")
-            author_url = BASE_URL + author_link_tag['href'] if author_link_tag else None
-
-            tag_nodes = qnode.select(".tags a.tag")
-            tags = [t.text.strip() for t in tag_nodes]
-
-            quotes_data.append({
-                "quote": quote_text,
-                "author": author_name,
-                "author_url": author_url,
-                "tags": tags
-            })
-
-        next_btn = soup.find("li", class_="next")
-        page_url = BASE_URL + next_btn.a['href'] if next_btn and next_btn.a else None
-
-    for item in quotes_data:
-        name = item["author"]
-        url = item["author_url"]
-        if name not in authors_cache:
-            if url:
-                authors_cache[name] = get_author_details(url)
-            else:
+# Fonction principale pour scraper le site et exporter les données (asynchrone)
+async def scrape_and_export_async(base_url=BASE_URL, out_prefix="quotes_graph"):
+    authors_cache = {}
+    quotes_data = []
+
+    connector = aiohttp.TCPConnector(limit=MAX_CONCURRENCY, ttl_dns_cache=300)
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+    }
+    async with aiohttp.ClientSession(connector=connector, headers=headers) as session:
+        # La pagination reste séquentielle : chaque page dépend du bouton 'next'
+        page_url = base_url
+        while page_url:
+            print(f"Scraping page: {page_url}")
+            soup = await fetch_with_cache(session, page_url)
+
+            quote_nodes = _SEL_QUOTE.select(soup)
+            for qnode in quote_nodes:
+                text_tag = qnode.find("span", class_="text")
+                quote_text = text_tag.text.strip() if text_tag else ""
+
+                author_tag = qnode.find("small", class_="author")
+                author_name = author_tag.text.strip() if author_tag else "Unknown"
+
+                author_link_tag = _SEL_AUTHOR_LINK.select_one(qnode)
+                author_url = BASE_URL + author_link_tag['href'] if author_link_tag else None
+
+                tag_nodes = _SEL_TAGS.select(qnode)
+                tags = [t.text.strip() for t in tag_nodes]
+
+                quotes_data.append({
+                    "quote": quote_text,
+                    "author": author_name,
+                    "author_url": author_url,
+                    "tags": tags
+                })
+
+            next_btn = soup.find("li", class_="next")
+            page_url = BASE_URL + next_btn.a['href'] if next_btn and next_btn.a else None
+
+        # Les pages d'auteurs sont indépendantes : on les récupère en parallèle,
+        # avec un sémaphore pour borner la concurrence
+        sem = asyncio.Semaphore(MAX_CONCURRENCY)
+
+        async def fetch_author(name, url):
+            async with sem:
+                return name, await get_author_details(session, url)
+
+        name_to_url = {}
+        for item in quotes_data:
+            if item["author"] not in name_to_url:
+                name_to_url[item["author"]] = item["author_url"]
+
+        tasks = [fetch_author(name, url) for name, url in name_to_url.items() if url]
+        for name, details in await asyncio.gather(*tasks):
+            authors_cache[name] = details
+
+        for name, url in name_to_url.items():
+            if name not in authors_cache:
                 authors_cache[name] = {
                     "name": name,
                     "biography": None,
@@ -104,18 +142,21 @@ def scrape_and_export(base_url=BASE_URL, out_prefix="quotes_graph"):
                 }
 
     G = nx.DiGraph()
+    # Les attributs sont assainis à l'insertion (None -> '') : les writers
+    # GraphML/GEXF ne supportent pas None, et on évite ainsi de re-parcourir
+    # tous les nœuds et arêtes du graphe après coup
     for a_name, a_info in authors_cache.items():
         G.add_node(f"author::{a_name}",
                 type="author",
                 label=a_name,
-                biography=a_info.get("biography"),
-                born_date=a_info.get("born_date"),
-                born_location=a_info.get("born_location"),
-                death_date=a_info.get("death_date"),
-                url=a_info.get("url"))
+                biography=a_info.get("biography") or "",
+                born_date=a_info.get("born_date") or "",
+                born_location=a_info.get("born_location") or "",
+                death_date=a_info.get("death_date") or "",
+                url=a_info.get("url") or "")
 
     for i, item in enumerate(quotes_data):
-        q_id = f"quote::{i}" 
+        q_id = f"quote::{i}"
         G.add_node(q_id, type="quote", text=item["quote"])
         a_node = f"author::{item['author']}"
         G.add_edge(q_id, a_node, relation="said_by")
@@ -128,38 +169,16 @@ def scrape_and_export(base_url=BASE_URL, out_prefix="quotes_graph"):
     graphml_path = f"{out_prefix}.graphml"
     gexf_path = f"{out_prefix}.gexf"
 
-
-    def _sanitize_value(v):
-        if v is None:
-            return ""
-        if isinstance(v, (str, int, float, bool)):
-            return v
-        try:
-            return _json.dumps(v)
-        except Exception:
-            return str(v)
-
-    for n, attrs in list(G.nodes(data=True)):
-        for k, val in list(attrs.items()):
-            attrs[k] = _sanitize_value(val)
-
-    for u, v, attrs in list(G.edges(data=True)):
-        for k, val in list(attrs.items()):
-            attrs[k] = _sanitize_value(val)
-
     nx.write_graphml(G, graphml_path)
     nx.write_gexf(G, gexf_path)
     print(f"Exported GraphML -> {graphml_path}")
     print(f"Exported GEXF   -> {gexf_path}")
 
-    author_counts = {}
-    for node, data in G.nodes(data=True):
-        if data.get("type") == "author":
-            in_edges = G.in_edges(node)
-            count = sum(1 for (u, v) in in_edges if G.nodes[u].get("type") == "quote")
-            author_counts[node.replace("author::", "")] = count
-
-    top_authors = sorted(author_counts.items(), key=lambda x: x[1], reverse=True)
+    # Chaque arête quote -> auteur correspond à une citation : le classement
+    # se déduit directement des données scrapées en un seul comptage, sans
+    # parcourir les arêtes entrantes de chaque nœud auteur du graphe
+    author_counts = Counter(item["author"] for item in quotes_data)
+    top_authors = author_counts.most_common()
 
     return {
         "graph": G,
@@ -168,6 +187,10 @@ def scrape_and_export(base_url=BASE_URL, out_prefix="quotes_graph"):
         "top_authors": top_authors
     }
 
+# Point d'entrée synchrone : lance la version asynchrone
+def scrape_and_export(base_url=BASE_URL, out_prefix="quotes_graph"):
+    return asyncio.run(scrape_and_export_async(base_url, out_prefix))
+
 
 if __name__ == "__main__":
     result = scrape_and_export()
@@ -1,16 +1,42 @@
 import requests
+import requests_cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
-from datetime import datetime
+from datetime import datetime, timedelta
 import pandas as pd
+import numpy as np
 import argparse
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urljoin
 
 BASE_URL = "https://realpython.github.io/fake-jobs/"
 
+# Session partagée avec keep-alive + cache HTTP persistant : les pages déjà
+# téléchargées sont relues depuis http_cache.sqlite (revalidation
+# ETag/Last-Modified incluse) au lieu d'être re-téléchargées à chaque run
+SESSION = requests_cache.CachedSession(
+    'http_cache',
+    backend='sqlite',
+    expire_after=timedelta(hours=24),
+    allowable_methods=('GET',)
+)
+_adapter = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.3,
+                      status_forcelist=[429, 500, 502, 503, 504])
+)
+SESSION.mount('http://', _adapter)
+SESSION.mount('https://', _adapter)
+SESSION.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept-Encoding': 'gzip, deflate'
+})
+
 # Fonction pour scraper les offres d'emploi du site
 def scrape_jobs():
-    response = requests.get(BASE_URL)
-    soup = BeautifulSoup(response.text, "html.parser")
+    response = SESSION.get(BASE_URL, timeout=10)
+    soup = BeautifulSoup(response.text, "lxml")
 
     jobs = []
     job_cards = soup.select("div.card-content")
@@ -34,28 +60,32 @@ def scrape_jobs():
 
 
 # Fonction pour nettoyer et filtrer les offres d'emploi
+# Retourne un DataFrame : toutes les opérations (filtre par mot-clé,
+# validation d'URL, parsing de dates, déduplication) sont vectorisées
+# en un passage C par colonne au lieu d'une boucle Python par offre
 def clean_and_filter(jobs, keyword="Python"):
-    filtered = []
-    seen = set()  
-    for job in jobs:
-        if keyword.lower() in job["title"].lower():
-            parsed = urlparse(job["apply_url"])
-            if not (parsed.scheme and parsed.netloc):
-                continue  
-            try:
-                job["date_posted"] = datetime.strptime(job["date_posted"], "%Y-%m-%d").date()
-            except Exception:
-                job["date_posted"] = None
-
-            job_id = (job["title"], job["company"], job["location"])
-            if job_id in seen:
-                continue
-            seen.add(job_id)
-
-            job["contract_type"] = "Full-time" if "Senior" in job["title"] else "Contract"
-            filtered.append(job)
-
-    return filtered
+    df = pd.DataFrame(jobs)
+    if df.empty:
+        return df
+
+    # Filtre par mot-clé dans le titre (insensible à la casse) ;
+    # regex=False : le mot-clé vient de la ligne de commande et doit être
+    # cherché tel quel ("C++" n'est pas une expression régulière)
+    df = df[df["title"].str.contains(keyword, case=False, na=False, regex=False)]
+
+    # Ne garde que les URLs absolues valides (schéma + domaine)
+    df = df[df["apply_url"].str.match(r"^https?://[^/]+", na=False)]
+
+    # Déduplication sur (titre, société, ville)
+    df = df.drop_duplicates(["title", "company", "location"]).copy()
+
+    # Parsing des dates vectorisé ; les dates invalides deviennent NaT
+    df["date_posted"] = pd.to_datetime(df["date_posted"], format="%Y-%m-%d", errors="coerce").dt.date
+
+    # Type de contrat déduit du titre
+    df["contract_type"] = np.where(df["title"].str.contains("Senior"), "Full-time", "Contract")
+
+    return df
 
 # Fonction pour afficher des statistiques sur les offres d'emploi
 def job_statistics(df):
@@ -74,10 +104,10 @@ def main():
     args = parser.parse_args()
 
     print("Scraping des offres...")
-    jobs = scrape_jobs()
-    jobs = clean_and_filter(jobs, args.keyword)
-
-    df = pd.DataFrame(jobs)
+    # La session est fermée proprement à la fin grâce au 'with'
+    with SESSION:
+        jobs = scrape_jobs()
+    df = clean_and_filter(jobs, args.keyword)
 
     if args.city:
         df = df[df["location"].str.contains(args.city, case=False)]
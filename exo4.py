@@ -1,80 +1,130 @@
-import sys
-import subprocess
-
-def _ensure_packages(pkgs):
-    missing = []
-    for mod, pkg in pkgs:
-        try:
-            __import__(mod)
-        except Exception:
-            missing.append(pkg)
-    if missing:
-        print("Installing missing packages:", missing)
-        subprocess.check_call([sys.executable, "-m", "pip", "install", *missing])
-
-_required = [
-    ("requests", "requests"),
-    ("bs4", "beautifulsoup4"),
-    ("pandas", "pandas"),
-    ("matplotlib", "matplotlib"),
-    ("fpdf", "fpdf"),
-    ("plotly", "plotly"),
-    ("urllib", "urllib3"),
-    ("numpy", "numpy"),
-]
-_ensure_packages(_required)
-
 import requests
+import requests_cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
+import soupsieve as sv
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # Backend non interactif : rendu des figures plus rapide
 import matplotlib.pyplot as plt
 from fpdf import FPDF
 import plotly.express as px
+import re
 from urllib.parse import urljoin
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 import numpy as np
+import pyarrow as pa
 
 BASE_URL = "https://books.toscrape.com/"
 
+# Regex précompilée pour extraire le prix numérique ("£51.77" -> "51.77")
+_PRICE_RE = re.compile(r"[\d.]+")
+
+# Sélecteurs CSS compilés une seule fois : évite de re-parser la chaîne du
+# sélecteur à chaque livre de chaque page
+_SEL_PRODUCT = sv.compile("article.product_pod")
+_SEL_PRICE = sv.compile(".price_color")
+_SEL_INSTOCK = sv.compile(".availability.instock")
+_SEL_BREADCRUMB = sv.compile(".breadcrumb li:nth-of-type(3)")
+
+# Session partagée avec keep-alive + cache HTTP persistant : les pages déjà
+# téléchargées sont relues depuis http_cache.sqlite (revalidation
+# ETag/Last-Modified incluse) au lieu d'être re-téléchargées à chaque run
+SESSION = requests_cache.CachedSession(
+    'http_cache',
+    backend='sqlite',
+    expire_after=timedelta(hours=24),
+    allowable_methods=('GET',)
+)
+_adapter = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.3,
+                      status_forcelist=[429, 500, 502, 503, 504])
+)
+SESSION.mount('http://', _adapter)
+SESSION.mount('https://', _adapter)
+SESSION.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept-Encoding': 'gzip, deflate'
+})
+
 # Fonction pour scraper toutes les pages et retourner un DataFrame avec les infos des livres
 def scrape_books():
-    books = []
-    page_url = BASE_URL
+    # Stockage en colonnes (SoA) plutôt qu'un dict par livre : pas de
+    # milliers de petits dicts à allouer, et la conversion finale vers
+    # pandas se fait en un bloc contigu typé par colonne
+    titles = []
+    ratings = []
+    prices = []
+    categories = []
+    in_stocks = []
+    urls = []
 
     def rating_to_int(rating_str):
         ratings = {"One": 1, "Two": 2, "Three": 3, "Four": 4, "Five": 5}
         return ratings.get(rating_str, None)
 
-    while page_url:
-        print(f"Scraping {page_url}...")
-        r = requests.get(page_url)
-        soup = BeautifulSoup(r.text, "html.parser")
-
-        for article in soup.select("article.product_pod"):
-            title = article.h3.a["title"]
-            rating = rating_to_int(article.p["class"][1])
-            price_text = article.select_one(".price_color").text.replace("£", "")
-            price = float(''.join(c for c in price_text if c.isdigit() or c == '.'))
-            availability = "In stock" in article.select_one(".availability").text
-            relative_link = article.h3.a["href"]
-            link = urljoin(page_url, relative_link)
-            category = soup.select_one(".breadcrumb li:nth-of-type(3)").text.strip() if soup.select_one(".breadcrumb li:nth-of-type(3)") else "Unknown"
-
-            books.append({
-                "title": title,
-                "rating": rating,
-                "price": price,
-                "category": category,
-                "in_stock": availability,
-                "url": link
-            })
-
-        next_btn = soup.select_one("li.next a")
-        if next_btn:
-            page_url = urljoin(page_url, next_btn["href"])
-        else:
-            page_url = None
-
-    df = pd.DataFrame(books)
+    # Extrait tous les livres d'une page de liste déjà parsée
+    def parse_page(soup, page_url):
+        # Le fil d'Ariane est un invariant de la page : on le lit une seule
+        # fois au lieu de relancer le sélecteur pour chacun des ~20 livres
+        crumb = _SEL_BREADCRUMB.select_one(soup)
+        page_category = crumb.text.strip() if crumb else "Unknown"
+
+        for article in _SEL_PRODUCT.select(soup):
+            m = _PRICE_RE.search(_SEL_PRICE.select_one(article).text)
+            price = float(m.group()) if m else float('nan')
+
+            titles.append(article.h3.a["title"])
+            ratings.append(rating_to_int(article.p["class"][1]))
+            prices.append(price)
+            categories.append(page_category)
+            # La disponibilité se lit sur la classe CSS de l'élément,
+            # aucun parsing de texte nécessaire
+            in_stocks.append(_SEL_INSTOCK.select_one(article) is not None)
+            urls.append(urljoin(page_url, article.h3.a["href"]))
+
+    # Page 1 : sert aussi à découvrir le nombre total de pages
+    print(f"Scraping {BASE_URL}...")
+    r = SESSION.get(BASE_URL, timeout=10)
+    soup = BeautifulSoup(r.text, "lxml")
+    parse_page(soup, BASE_URL)
+
+    # Le pager affiche "Page 1 of 50" : les URLs suivantes sont prévisibles
+    # (page-2.html, page-3.html, ...), donc on les télécharge en parallèle
+    # au lieu de suivre le bouton 'next' séquentiellement
+    current = soup.select_one(".pager .current")
+    total_pages = int(current.text.strip().split()[-1]) if current else 1
+    page_urls = [urljoin(BASE_URL, f"catalogue/page-{i}.html") for i in range(2, total_pages + 1)]
+
+    with ThreadPoolExecutor(max_workers=16) as ex:
+        responses = ex.map(lambda u: SESSION.get(u, timeout=10), page_urls)
+        for url, resp in zip(page_urls, responses):
+            print(f"Scraping {url}...")
+            parse_page(BeautifulSoup(resp.text, "lxml"), url)
+
+    # Une allocation contiguë par colonne, avec des types compacts
+    # (int8/float32/bool) au lieu d'objets Python boxés
+    table = pa.table({
+        "title": pa.array(titles, pa.string()),
+        "rating": pa.array(ratings, pa.int8()),
+        "price": pa.array(prices, pa.float32()),
+        "category": pa.array(categories, pa.string()),
+        "in_stock": pa.array(in_stocks, pa.bool_()),
+        "url": pa.array(urls, pa.string()),
+    })
+    df = table.to_pandas()
+
+    # Types compacts côté pandas : Int8 nullable pour la note, dtype
+    # 'category' pour les ~50 catégories répétées sur 1000 lignes (les
+    # groupby passent alors par le chemin rapide à clés entières)
+    df['rating'] = df['rating'].astype('Int8')
+    df['category'] = df['category'].astype('category')
+    df['in_stock'] = df['in_stock'].astype(bool)
+    df['price'] = df['price'].astype('float32')
     return df
 
 # Fonction pour analyser les données des livres
@@ -105,24 +155,26 @@ def analyze_books(df):
 def generate_report(df, analysis):
     print("\nGénération du rapport...")
 
-    plt.figure(figsize=(6, 4))
-    df["rating"].value_counts().sort_index().plot(kind="bar", title="Distribution des notes")
-    plt.xlabel("Note"); plt.ylabel("Nombre de livres")
-    plt.tight_layout()
-    plt.savefig("ratings_distribution.png")
-    plt.close()
-
-    plt.figure(figsize=(6, 4))
-    analysis["avg_price_by_rating"].plot(kind="bar", color="orange", title="Prix moyen par note (£)")
-    plt.tight_layout()
-    plt.savefig("avg_price_by_rating.png")
-    plt.close()
-
-    plt.figure(figsize=(8, 5))
-    analysis["avg_price_by_category"].sort_values(ascending=False)[:10].plot(kind="barh", title="Top 10 catégories par prix moyen")
-    plt.tight_layout()
-    plt.savefig("avg_price_by_category.png")
-    plt.close()
+    # Une seule Figure réutilisée pour les trois graphiques : ax.clear()
+    # entre chaque rendu évite de réallouer une figure à chaque fois
+    fig, ax = plt.subplots(figsize=(8, 5))
+
+    df["rating"].value_counts().sort_index().plot(kind="bar", ax=ax, title="Distribution des notes")
+    ax.set_xlabel("Note"); ax.set_ylabel("Nombre de livres")
+    fig.tight_layout()
+    fig.savefig("ratings_distribution.png", dpi=100)
+
+    ax.clear()
+    analysis["avg_price_by_rating"].plot(kind="bar", ax=ax, color="orange", title="Prix moyen par note (£)")
+    fig.tight_layout()
+    fig.savefig("avg_price_by_rating.png", dpi=100)
+
+    ax.clear()
+    analysis["avg_price_by_category"].sort_values(ascending=False)[:10].plot(kind="barh", ax=ax, title="Top 10 catégories par prix moyen")
+    fig.tight_layout()
+    fig.savefig("avg_price_by_category.png", dpi=100)
+
+    plt.close(fig)
 
     pdf = FPDF()
     pdf.add_page()
@@ -156,7 +208,9 @@ def price_alert(df, threshold=50):
 
 
 if __name__ == "__main__":
-    df_books = scrape_books()
+    # La session est fermée proprement à la fin grâce au 'with'
+    with SESSION:
+        df_books = scrape_books()
     analysis = analyze_books(df_books)
     generate_report(df_books, analysis)
     price_alert(df_books, threshold=45)
@@ -1,99 +1,132 @@
-import requests
-from bs4 import BeautifulSoup
-import json
-from collections import defaultdict
+import asyncio
+import aiohttp
+from selectolax.lexbor import LexborHTMLParser
+import heapq
+import orjson
+import numpy as np
+from array import array
+from dataclasses import dataclass
 from urllib.parse import urljoin
 import time
 
+# Table de conversion construite une seule fois au chargement du module,
+# au lieu d'un dict littéral réalloué pour chacun des ~1000 livres
+_RATING_MAP = {'One': 1, 'Two': 2, 'Three': 3, 'Four': 4, 'Five': 5}
+
+# Une catégorie est une petite structure figée : dataclass avec slots
+# (pas de __dict__ par instance) plutôt qu'un dict qui redupliquerait le
+# nom déjà porté par la clé de self.categories
+@dataclass(slots=True)
+class Category:
+    id: int
+    url: str
+    parent: str | None = None
+
 class BooksScraperAdvanced:
-    def __init__(self, base_url="https://books.toscrape.com/"):
+    def __init__(self, base_url="https://books.toscrape.com/", max_concurrency=8):
         self.base_url = base_url
         self.categories = {}
-        self.books_by_category = defaultdict(list)
+        # Stockage en colonnes (SoA) plutôt qu'une liste de dicts par
+        # catégorie : une colonne compacte par champ, accès mémoire
+        # séquentiel, et les analyses se font par masque sur cat_ids
+        self.titles = []
+        # Titres en minuscules précalculés une fois à l'extraction : la
+        # recherche ne refait pas lower() sur tout le catalogue à chaque requête
+        self.titles_lower = []
+        self.prices = array('f')
+        self.ratings = array('b')
+        self.in_stock = bytearray()
+        self.cat_ids = array('H')
+        # Borne le nombre de requêtes simultanées (politesse envers le serveur)
+        self.max_concurrency = max_concurrency
 
-    # Fonction pour récupérer le contenu d'une URL
-    def get_soup(self, url):
+    # Fonction pour récupérer le contenu d'une URL (asynchrone)
+    # Lexbor est un parseur HTML5 en C : quasiment aucune allocation Python
+    # par nœud, contrairement à l'arbre d'objets de BeautifulSoup
+    async def get_soup(self, session, url):
         try:
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            return BeautifulSoup(response.content, 'html.parser')
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as response:
+                response.raise_for_status()
+                return LexborHTMLParser(await response.read())
         except Exception as e:
             print(f"Erreur lors de la récupération de {url}: {e}")
             return None
 
     # Fonction pour extraire les catégories
-    def extract_categories(self):
+    async def extract_categories(self, session):
         print("Extraction des catégories...")
-        soup = self.get_soup(self.base_url)
+        soup = await self.get_soup(session, self.base_url)
         if not soup:
             return
         
-        category_list = soup.find('ul', class_='nav-list').find('ul')
-        
-        for idx, cat_link in enumerate(category_list.find_all('a'), 1):
-            cat_name = cat_link.text.strip()
-            cat_url = urljoin(self.base_url, cat_link['href'])
-            
-            self.categories[cat_name] = {
-                'id': idx,
-                'name': cat_name,
-                'url': cat_url,
-                'books': [],
-                'parent': None 
-            }
-        
+        self.categories = {
+            cat_link.text().strip(): Category(
+                id=idx,
+                url=urljoin(self.base_url, cat_link.attributes['href'])
+            )
+            for idx, cat_link in enumerate(soup.css('ul.nav-list ul a'), 1)
+        }
+
         print(f"{len(self.categories)} catégories trouvées")
     
     # Fonction pour scraper les livres d'une catégorie
-    def scrape_category(self, cat_name, cat_info):
+    # La pagination interne reste séquentielle (chaque page dépend du bouton
+    # 'next'), mais les catégories elles-mêmes sont scrapées en parallèle
+    async def scrape_category(self, session, cat_name, cat_info):
         print(f"Scraping: {cat_name}...")
-        
-        current_url = cat_info['url']
+
+        current_url = cat_info.url
+        cat_id = cat_info.id
         page_num = 1
-        
+        n_books = 0
+
         while current_url:
-            soup = self.get_soup(current_url)
+            soup = await self.get_soup(session, current_url)
             if not soup:
                 break
-            
-            books = soup.find_all('article', class_='product_pod')
-            
+
+            books = soup.css('article.product_pod')
+
             for book in books:
                 book_data = self.extract_book_data(book)
                 if book_data:
-                    cat_info['books'].append(book_data)
-            
-            next_button = soup.find('li', class_='next')
+                    # Une ligne = un append par colonne, taguée par cat_id
+                    title, price, rating, in_stock = book_data
+                    self.titles.append(title)
+                    self.titles_lower.append(title.lower())
+                    self.prices.append(price)
+                    self.ratings.append(rating)
+                    self.in_stock.append(in_stock)
+                    self.cat_ids.append(cat_id)
+                    n_books += 1
+
+            next_button = soup.css_first('li.next a')
             if next_button:
-                next_link = next_button.find('a')['href']
-                base_cat_url = '/'.join(current_url.split('/')[:-1])
-                current_url = f"{base_cat_url}/{next_link}"
+                # urljoin resout le lien relatif selon la RFC (segments '..',
+                # ancres, query) au lieu d'un decoupage manuel de l'URL
+                current_url = urljoin(current_url, next_button.attributes['href'])
                 page_num += 1
             else:
                 current_url = None
-        
-        print(f"  → {len(cat_info['books'])} livres trouvés")
+
+        print(f"  → {n_books} livres trouvés")
 
     # Fonction pour extraire les données d'un livre
     def extract_book_data(self, book_element):
         try:
-            title = book_element.find('h3').find('a')['title']
-            price_text = book_element.find('p', class_='price_color').text
-            price = float(price_text.replace('£', '').strip())
-            
-            rating_class = book_element.find('p', class_='star-rating')['class'][1]
-            rating_map = {'One': 1, 'Two': 2, 'Three': 3, 'Four': 4, 'Five': 5}
-            rating = rating_map.get(rating_class, 0)
-            
-            availability = book_element.find('p', class_='instock availability')
-            in_stock = 'In stock' in availability.text if availability else False
+            title = book_element.css_first('h3 a').attributes['title']
+            price_text = book_element.css_first('p.price_color').text()
+            # removeprefix ne touche que le début de la chaîne, là où replace
+            # scanne tout le texte du prix
+            price = float(price_text.strip().removeprefix('£'))
+
+            rating_class = book_element.css_first('p.star-rating').attributes['class'].split()[1]
+            rating = _RATING_MAP.get(rating_class, 0)
+
+            availability = book_element.css_first('p.instock.availability')
+            in_stock = 'In stock' in availability.text() if availability else False
             
-            return {
-                'title': title,
-                'price': price,
-                'rating': rating,
-                'in_stock': in_stock
-            }
+            return (title, price, rating, in_stock)
         except Exception as e:
             print(f"  ⚠️  Erreur extraction livre: {e}")
             return None
@@ -101,48 +134,71 @@ class BooksScraperAdvanced:
     # Fonction pour calculer les statistiques
     def calculate_statistics(self):
         print("\nCalcul des statistiques...")
-        
+
+        # Vues NumPy zéro-copie sur les colonnes (protocole buffer des
+        # array/bytearray) : un masque par catégorie puis des réductions en C
+        prices = np.asarray(self.prices)
+        ratings = np.asarray(self.ratings)
+        in_stock = np.frombuffer(self.in_stock, dtype=np.bool_)
+        cat_ids = np.asarray(self.cat_ids)
+
         results = []
-        
+
         for cat_name, cat_info in self.categories.items():
-            books = cat_info['books']
-            
-            if not books:
+            mask = cat_ids == cat_info.id
+            idxs = np.nonzero(mask)[0]
+
+            if not idxs.size:
                 continue
-            
-            prices = [book['price'] for book in books]
-            ratings = [book['rating'] for book in books if book['rating'] > 0]
-            
+
+            cat_prices = prices[idxs]
+            cat_ratings = ratings[idxs]
+            rated = cat_ratings[cat_ratings > 0]
+
+            # Les dicts par livre ne sont reconstruits qu'ici, pour garder le
+            # même format d'export JSON qu'avant
+            books = [
+                {
+                    'title': self.titles[i],
+                    'price': round(float(prices[i]), 2),
+                    'rating': int(ratings[i]),
+                    'in_stock': bool(in_stock[i])
+                }
+                for i in idxs
+            ]
+
             stats = {
-                'id': cat_info['id'],
+                'id': cat_info.id,
                 'name': cat_name,
-                'total_books': len(books),
-                'price_min': min(prices),
-                'price_max': max(prices),
-                'price_avg': sum(prices) / len(prices),
-                'rating_avg': sum(ratings) / len(ratings) if ratings else 0,
-                'in_stock_count': sum(1 for b in books if b['in_stock']),
+                'total_books': int(idxs.size),
+                'price_min': float(cat_prices.min()),
+                'price_max': float(cat_prices.max()),
+                'price_avg': float(cat_prices.mean()),
+                'rating_avg': float(rated.mean()) if rated.size else 0,
+                'in_stock_count': int(in_stock[idxs].sum()),
                 'books': books
             }
-            
+
             results.append(stats)
-        
+
         return results
 
     # Fonction pour créer un classement des catégories
+    # Seul le top 10 est affiché/exporté : heapq.nlargest évite de trier
+    # entièrement la liste trois fois (O(n log k) au lieu de O(n log n))
     def create_ranking(self, results):
         print("\nCréation du classement...")
-        
-        by_count = sorted(results, key=lambda x: x['total_books'], reverse=True)
-        
-        by_price = sorted(results, key=lambda x: x['price_avg'], reverse=True)
-        
-        by_rating = sorted(results, key=lambda x: x['rating_avg'], reverse=True)
-        
+
+        by_count = heapq.nlargest(10, results, key=lambda x: x['total_books'])
+
+        by_price = heapq.nlargest(10, results, key=lambda x: x['price_avg'])
+
+        by_rating = heapq.nlargest(10, results, key=lambda x: x['rating_avg'])
+
         return {
-            'by_book_count': [{'name': c['name'], 'count': c['total_books']} for c in by_count[:10]],
-            'by_average_price': [{'name': c['name'], 'price': round(c['price_avg'], 2)} for c in by_price[:10]],
-            'by_average_rating': [{'name': c['name'], 'rating': round(c['rating_avg'], 2)} for c in by_rating[:10]]
+            'by_book_count': [{'name': c['name'], 'count': c['total_books']} for c in by_count],
+            'by_average_price': [{'name': c['name'], 'price': round(c['price_avg'], 2)} for c in by_price],
+            'by_average_rating': [{'name': c['name'], 'rating': round(c['rating_avg'], 2)} for c in by_rating]
         }
     
     # Fonction pour détecter les catégories sous-représentées
@@ -154,28 +210,44 @@ class BooksScraperAdvanced:
         return sorted(underrepresented, key=lambda x: x['total_books'])
     
     # Fonction pour rechercher des livres par mot-clé
-    def search_books(self, results, query):
+    # Un seul passage sur la colonne des titres, sans toucher aux dicts
+    def search_books(self, query):
         query_lower = query.lower()
+        id_to_name = {cat.id: name for name, cat in self.categories.items()}
         found_books = []
-        
-        for cat in results:
-            for book in cat['books']:
-                if query_lower in book['title'].lower():
-                    found_books.append({
-                        'category': cat['name'],
-                        'title': book['title'],
-                        'price': book['price'],
-                        'rating': book['rating']
-                    })
-        
+
+        for i, title_lower in enumerate(self.titles_lower):
+            if query_lower in title_lower:
+                found_books.append({
+                    'category': id_to_name.get(self.cat_ids[i], ''),
+                    'title': self.titles[i],
+                    'price': round(self.prices[i], 2),
+                    'rating': self.ratings[i]
+                })
+
         return found_books
     
+    # Fonction pour calculer les agrégats globaux une seule fois : ils sont
+    # réutilisés par display_summary et export_to_json au lieu d'être
+    # recalculés indépendamment dans chacun
+    def _compute_globals(self, results):
+        total_books = sum(cat['total_books'] for cat in results)
+        avg_price_global = (
+            sum(cat['price_avg'] * cat['total_books'] for cat in results) / total_books
+            if total_books else 0
+        )
+        return {
+            'total_books': total_books,
+            'avg_price_global': round(avg_price_global, 2)
+        }
+
     # Fonction pour exporter les données en JSON
-    def export_to_json(self, results, rankings, underrepresented, filename='books_analysis.json'):
+    def export_to_json(self, results, rankings, underrepresented, global_stats, filename='books_analysis.json'):
         output = {
             'metadata': {
                 'total_categories': len(results),
-                'total_books': sum(cat['total_books'] for cat in results),
+                'total_books': global_stats['total_books'],
+                'avg_price_global': global_stats['avg_price_global'],
                 'scrape_date': time.strftime('%Y-%m-%d %H:%M:%S')
             },
             'categories': results,
@@ -183,51 +255,73 @@ class BooksScraperAdvanced:
             'underrepresented_categories': underrepresented
         }
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(output, f, ensure_ascii=False, indent=2)
+        # orjson sérialise en C et rend directement des bytes : écriture
+        # binaire en un seul write, sans l'encodeur pur Python de json.dump
+        with open(filename, 'wb') as f:
+            f.write(orjson.dumps(output, option=orjson.OPT_INDENT_2))
 
         print(f"\nDonnées exportées dans '{filename}'")
 
-    # Fonction principale pour exécuter le scraping avancé
-    def run(self):
+    # Fonction principale pour exécuter le scraping avancé (asynchrone)
+    async def run_async(self):
         print("Démarrage du scraping avancé...\n")
 
-        self.extract_categories()
-        
-        for cat_name, cat_info in self.categories.items():
-            self.scrape_category(cat_name, cat_info)
-            time.sleep(0.5)  
-        
+        # Une seule session pour tout le scrape : les connexions TCP sont
+        # poolées et réutilisées (keep-alive) au lieu d'une poignée de main
+        # par requête
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency, ttl_dns_cache=300)
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+        }
+        async with aiohttp.ClientSession(connector=connector, headers=headers) as session:
+            await self.extract_categories(session)
+
+            # Les catégories sont indépendantes : on les scrape en parallèle,
+            # le sémaphore borne la concurrence effective
+            sem = asyncio.Semaphore(self.max_concurrency)
+
+            async def scrape_bounded(cat_name, cat_info):
+                async with sem:
+                    await self.scrape_category(session, cat_name, cat_info)
+
+            await asyncio.gather(*(
+                scrape_bounded(cat_name, cat_info)
+                for cat_name, cat_info in self.categories.items()
+            ))
+
         results = self.calculate_statistics()
         
         rankings = self.create_ranking(results)
         
         underrepresented = self.detect_underrepresented(results)
-        
-        self.display_summary(results, rankings, underrepresented)
-        
-        self.export_to_json(results, rankings, underrepresented)
+
+        global_stats = self._compute_globals(results)
+
+        self.display_summary(results, rankings, underrepresented, global_stats)
+
+        self.export_to_json(results, rankings, underrepresented, global_stats)
 
         print("\nDémonstration recherche full-text (mot: 'harry'):")
-        search_results = self.search_books(results, 'harry')
+        search_results = self.search_books('harry')
         for book in search_results[:5]:
             print(f"  - {book['title']} ({book['category']}) - £{book['price']}")
         
         return results
-    
+
+    # Point d'entrée synchrone : lance la version asynchrone
+    def run(self):
+        return asyncio.run(self.run_async())
+
     # Fonction pour afficher un résumé des résultats
-    def display_summary(self, results, rankings, underrepresented):
+    def display_summary(self, results, rankings, underrepresented, global_stats):
         print("\n" + "="*60)
         print("RÉSUMÉ DES RÉSULTATS")
         print("="*60)
-        
-        total_books = sum(cat['total_books'] for cat in results)
-        avg_price_global = sum(cat['price_avg'] * cat['total_books'] for cat in results) / total_books
-        
+
         print(f"\nStatistiques globales:")
         print(f"  • Catégories: {len(results)}")
-        print(f"  • Livres totaux: {total_books}")
-        print(f"  • Prix moyen global: £{avg_price_global:.2f}")
+        print(f"  • Livres totaux: {global_stats['total_books']}")
+        print(f"  • Prix moyen global: £{global_stats['avg_price_global']:.2f}")
         
         print(f"\nTop 5 catégories (par nombre de livres):")
         for i, cat in enumerate(rankings['by_book_count'][:5], 1):
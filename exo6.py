@@ -1,11 +1,17 @@
 import requests
-from bs4 import BeautifulSoup
+from selectolax.lexbor import LexborHTMLParser
+import os
+import re
 import time
-import json
+import orjson
+import queue
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional
+from urllib.parse import urljoin
 import sys
 
 # Configuration du logging
@@ -19,11 +25,18 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Recherche insensible a la casse directement sur les octets : pas besoin de
+# decoder la reponse ni d'allouer une copie lower() du corps entier
+_CAPTCHA_RE = re.compile(rb'captcha', re.IGNORECASE)
+
 
 class ResilientScraper:
-    def __init__(self, base_url: str, checkpoint_file: str = 'checkpoint.json'):
+    def __init__(self, base_url: str, checkpoint_file: str = 'checkpoint.json',
+                 books_checkpoint_file: str = 'checkpoint.jsonl',
+                 min_delay: float = 0.0):
         self.base_url = base_url
         self.checkpoint_file = checkpoint_file
+        self.books_checkpoint_file = books_checkpoint_file
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
@@ -40,115 +53,188 @@ class ResilientScraper:
         }
         
         self.delay = 1.0
-        self.min_delay = 0.5
+        # min_delay=0 par defaut : sur un serveur cooperatif le delai
+        # adaptatif peut descendre jusqu'a zero au lieu de plancher a 0.5s
+        self.min_delay = min_delay
         self.max_delay = 10.0
         self.timeout = 10
         self.max_retries = 5
         self.scraped_books = []
-        
+        # Index des URLs deja scrapees : test d'appartenance O(1) au lieu
+        # d'un scan lineaire de scraped_books a chaque livre
+        self._scraped_urls = set()
+        # Les livres d'une page sont recuperes par plusieurs threads : ce
+        # verrou serialise toutes les mutations d'etat partage (les
+        # compteurs de stats, le delai adaptatif, scraped_books et le
+        # fichier checkpoint JSONL) ; += sur un dict n'est pas atomique
+        self._lock = threading.Lock()
+        self.max_workers = 6
+
         self.load_checkpoint()
-    
+        self._scraped_urls = {book['url'] for book in self.scraped_books}
+        # Handle ouvert en append : chaque livre est ecrit en une ligne JSONL
+        # au fil de l'eau (cout constant), au lieu de reecrire toute la liste
+        # a chaque checkpoint (cout quadratique sur la duree du scrape)
+        self._ckpt_fp = open(self.books_checkpoint_file, 'ab')
+
+        # Les snapshots de stats sont ecrits par un thread dedie : le scraper
+        # ne bloque jamais sur le disque. maxsize=1 + put_nowait : si un
+        # snapshot attend deja, le nouveau est simplement abandonne
+        self._save_q: queue.Queue = queue.Queue(maxsize=1)
+        self._save_thread = threading.Thread(target=self._checkpoint_writer, daemon=True)
+        self._save_thread.start()
+
     # Fonction de gestion du checkpoint
     def load_checkpoint(self):
+        # Les livres sont relus ligne par ligne depuis le JSONL
+        books_path = Path(self.books_checkpoint_file)
+        if books_path.exists():
+            try:
+                with open(books_path, 'rb') as f:
+                    self.scraped_books = [orjson.loads(line) for line in f if line.strip()]
+                logger.info(f"Checkpoint charge: {len(self.scraped_books)} livres deja scraped")
+            except Exception as e:
+                logger.error(f"Erreur lors du chargement du checkpoint livres: {e}")
+
         checkpoint_path = Path(self.checkpoint_file)
         if checkpoint_path.exists():
             try:
-                with open(checkpoint_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.scraped_books = data.get('books', [])
-                    self.stats = data.get('stats', self.stats)
-                    logger.info(f"Checkpoint charge: {len(self.scraped_books)} livres deja scraped")
+                data = orjson.loads(checkpoint_path.read_bytes())
+                self.stats = data.get('stats', self.stats)
             except Exception as e:
                 logger.error(f"Erreur lors du chargement du checkpoint: {e}")
-                
-    # Sauvegarde du checkpoint
-    def save_checkpoint(self):
+
+    # Ecriture effective d'un snapshot : fichier temporaire puis renommage
+    # atomique, un crash en pleine ecriture ne corrompt jamais le checkpoint
+    def _write_checkpoint(self, checkpoint_data: Dict):
         try:
-            checkpoint_data = {
-                'books': self.scraped_books,
-                'stats': self.stats,
-                'last_save': datetime.now().isoformat()
-            }
-            with open(self.checkpoint_file, 'w', encoding='utf-8') as f:
-                json.dump(checkpoint_data, f, indent=2, ensure_ascii=False)
+            tmp_path = self.checkpoint_file + '.tmp'
+            # orjson encode en C et rend des bytes : un seul write binaire
+            with open(tmp_path, 'wb') as f:
+                f.write(orjson.dumps(checkpoint_data, option=orjson.OPT_INDENT_2))
+            os.replace(tmp_path, self.checkpoint_file)
             logger.debug("Checkpoint sauvegarde")
         except Exception as e:
             logger.error(f"Erreur lors de la sauvegarde du checkpoint: {e}")
 
+    # Boucle du thread d'ecriture (daemon) : draine la file jusqu'au sentinel
+    def _checkpoint_writer(self):
+        while True:
+            snapshot = self._save_q.get()
+            if snapshot is None:
+                break
+            self._write_checkpoint(snapshot)
+
+    # Sauvegarde du checkpoint (stats uniquement : les livres partent dans le
+    # JSONL des leur scraping) — asynchrone, via le thread d'ecriture
+    def save_checkpoint(self):
+        snapshot = {
+            'stats': dict(self.stats),
+            'last_save': datetime.now().isoformat()
+        }
+        try:
+            self._save_q.put_nowait(snapshot)
+        except queue.Full:
+            # Un snapshot est deja en attente d'ecriture : celui-ci est
+            # redondant, on le jette plutot que de bloquer le scraping
+            pass
+
     # Ajustement du delai entre les requetes
     def adaptive_delay(self, success: bool):
-        if success:
-            self.delay = max(self.min_delay, self.delay * 0.9)
-        else:
-            self.delay = min(self.max_delay, self.delay * 1.5)
+        # Lecture-modification-ecriture de self.delay : sous verrou pour ne
+        # pas perdre d'ajustement quand plusieurs threads finissent en meme
+        # temps
+        with self._lock:
+            if success:
+                self.delay = max(self.min_delay, self.delay * 0.9)
+            else:
+                self.delay = min(self.max_delay, self.delay * 1.5)
         logger.debug(f"Delai ajuste a {self.delay:.2f}s")
     
     # Detection de blocage
     def detect_blocking(self, response: requests.Response) -> bool:
         if response.status_code in [403, 429]:
-            self.stats['blocked_detections'] += 1
+            with self._lock:
+                self.stats['blocked_detections'] += 1
             logger.warning(f"Blocage potentiel detecte: HTTP {response.status_code}")
             return True
         
-        if 'captcha' in response.text.lower():
-            self.stats['blocked_detections'] += 1
+        # Un captcha s'annonce dans l'en-tete de page : scanner les 8 premiers
+        # Ko suffit, inutile de parcourir les ~50 Ko de chaque page de livres
+        if _CAPTCHA_RE.search(response.content, 0, 8192):
+            with self._lock:
+                self.stats['blocked_detections'] += 1
             logger.warning("Captcha detecte dans la reponse")
             return True
         
         return False
     
     # Requete avec gestion des erreurs et retries
-    def make_request(self, url: str, retries: int = 0) -> Optional[requests.Response]:
-        self.stats['total_requests'] += 1
-        
-        try:
-            time.sleep(self.delay)
-            
-            timeout = self.timeout * (1 + retries * 0.5)
-            response = self.session.get(url, timeout=timeout)
-            
-            if self.detect_blocking(response):
-                if retries < self.max_retries:
-                    wait_time = self.delay * (2 ** retries)
-                    logger.info(f"Attente de {wait_time:.2f}s avant retry...")
-                    time.sleep(wait_time)
-                    self.stats['retries'] += 1
-                    return self.make_request(url, retries + 1)
-                else:
+    # Boucle iterative plutot que recursion : une seule frame Python quel
+    # que soit le nombre de tentatives, et un seul point de sortie en echec
+    def make_request(self, url: str) -> Optional[requests.Response]:
+        # Liaison locale : un seul chargement des attributs self.stats et
+        # self._lock par appel ; chaque increment de compteur prend le
+        # verrou, += sur le dict partage n'etant pas atomique entre threads
+        stats = self.stats
+        lock = self._lock
+
+        for attempt in range(self.max_retries + 1):
+            with lock:
+                stats['total_requests'] += 1
+
+            try:
+                # En dessous de 10ms le sleep coute plus cher (syscall +
+                # ordonnanceur) qu'il ne ralentit : on le saute
+                if self.delay > 0.01:
+                    time.sleep(self.delay)
+
+                timeout = self.timeout * (1 + attempt * 0.5)
+                response = self.session.get(url, timeout=timeout)
+
+                if self.detect_blocking(response):
+                    if attempt < self.max_retries:
+                        wait_time = self.delay * (2 ** attempt)
+                        logger.info(f"Attente de {wait_time:.2f}s avant retry...")
+                        time.sleep(wait_time)
+                        with lock:
+                            stats['retries'] += 1
+                        continue
                     logger.error(f"Blocage confirme apres {self.max_retries} tentatives")
-                    self.stats['failed_requests'] += 1
-                    return None
-            
-            response.raise_for_status()
-            self.stats['successful_requests'] += 1
-            self.adaptive_delay(True)
-            
-            return response
-            
-        except requests.exceptions.Timeout:
-            logger.warning(f"Timeout sur {url} (tentative {retries + 1}/{self.max_retries})")
-            if retries < self.max_retries:
-                self.stats['retries'] += 1
-                return self.make_request(url, retries + 1)
-            else:
-                self.stats['failed_requests'] += 1
-                self.adaptive_delay(False)
-                return None
-                
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Erreur requete sur {url}: {e}")
-            if retries < self.max_retries:
-                self.stats['retries'] += 1
-                time.sleep(self.delay * (retries + 1))
-                return self.make_request(url, retries + 1)
-            else:
-                self.stats['failed_requests'] += 1
-                self.adaptive_delay(False)
-                return None
+                    break
+
+                response.raise_for_status()
+                with lock:
+                    stats['successful_requests'] += 1
+                self.adaptive_delay(True)
+
+                return response
+
+            except requests.exceptions.Timeout:
+                logger.warning(f"Timeout sur {url} (tentative {attempt + 1}/{self.max_retries})")
+                if attempt < self.max_retries:
+                    with lock:
+                        stats['retries'] += 1
+                    continue
+                break
+
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Erreur requete sur {url}: {e}")
+                if attempt < self.max_retries:
+                    with lock:
+                        stats['retries'] += 1
+                    time.sleep(self.delay * (attempt + 1))
+                    continue
+                break
+
+        with lock:
+            stats['failed_requests'] += 1
+        self.adaptive_delay(False)
+        return None
     
     # Scraping des details d'un livre
     def scrape_book(self, book_url: str) -> Optional[Dict]:
-        if any(book['url'] == book_url for book in self.scraped_books):
+        if book_url in self._scraped_urls:
             logger.debug(f"Livre deja scrape: {book_url}")
             return None
         
@@ -157,24 +243,31 @@ class ResilientScraper:
             return None
         
         try:
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            title = soup.find('h1')
-            price = soup.find('p', class_='price_color')
-            availability = soup.find('p', class_='instock availability')
-            rating = soup.find('p', class_='star-rating')
-            
+            # Lexbor : parseur HTML5 en C, pas d'arbre d'objets Python à construire
+            soup = LexborHTMLParser(response.content)
+
+            title = soup.css_first('h1')
+            price = soup.css_first('p.price_color')
+            availability = soup.css_first('p.instock.availability')
+            rating = soup.css_first('p.star-rating')
+
             book_data = {
                 'url': book_url,
-                'title': title.text.strip() if title else 'N/A',
-                'price': price.text.strip() if price else 'N/A',
-                'availability': availability.text.strip() if availability else 'N/A',
-                'rating': rating['class'][1] if rating else 'N/A',
+                'title': title.text().strip() if title else 'N/A',
+                'price': price.text().strip() if price else 'N/A',
+                'availability': availability.text().strip() if availability else 'N/A',
+                'rating': rating.attributes['class'].split()[1] if rating else 'N/A',
                 'scraped_at': datetime.now().isoformat()
             }
             
-            self.scraped_books.append(book_data)
-            self.stats['books_scraped'] += 1
+            with self._lock:
+                self.scraped_books.append(book_data)
+                self._scraped_urls.add(book_url)
+                # Append incremental : une ligne par livre, flush immediat
+                # pour que rien d'en cours ne soit perdu en cas de crash
+                self._ckpt_fp.write(orjson.dumps(book_data) + b'\n')
+                self._ckpt_fp.flush()
+                self.stats['books_scraped'] += 1
             logger.info(f"Livre scrape: {book_data['title']}")
             
             return book_data
@@ -184,42 +277,47 @@ class ResilientScraper:
             return None
     
     # Scraping du catalogue complet
+    # Les pages de liste restent sequentielles, mais les ~20 pages de detail
+    # de chaque page sont des I/O independantes : un pool de threads les
+    # telecharge en parallele (le GIL est relache pendant l'attente reseau,
+    # la session requests fournit les connexions poolees)
     def scrape_catalogue(self):
         logger.info("Debut du scraping du catalogue")
         page = 1
-        
+
         try:
-            while True:
-                if page == 1:
-                    url = f"{self.base_url}/catalogue/page-{page}.html"
-                else:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                while True:
                     url = f"{self.base_url}/catalogue/page-{page}.html"
-                
-                logger.info(f"Scraping de la page {page}")
-                response = self.make_request(url)
-                
-                if not response:
-                    logger.warning(f"Impossible de recuperer la page {page}")
-                    break
-                
-                soup = BeautifulSoup(response.content, 'html.parser')
-                books = soup.find_all('article', class_='product_pod')
-                
-                if not books:
-                    logger.info("Aucun livre trouve, fin du catalogue")
-                    break
-                
-                for book in books:
-                    link = book.find('h3').find('a')['href']
-                    book_url = f"{self.base_url}/catalogue/{link.replace('../../../', '')}"
-                    self.scrape_book(book_url)
-                    
-                    if self.stats['books_scraped'] % 10 == 0:
-                        self.save_checkpoint()
-                        self.print_stats()
-                
-                page += 1
-                
+
+                    logger.info(f"Scraping de la page {page}")
+                    response = self.make_request(url)
+
+                    if not response:
+                        logger.warning(f"Impossible de recuperer la page {page}")
+                        break
+
+                    soup = LexborHTMLParser(response.content)
+                    books = soup.css('article.product_pod')
+
+                    if not books:
+                        logger.info("Aucun livre trouve, fin du catalogue")
+                        break
+
+                    # urljoin resout les hrefs relatifs par rapport a la page
+                    # courante, sans nettoyage manuel des segments '../'
+                    book_urls = [
+                        urljoin(url, book.css_first('h3 a').attributes['href'])
+                        for book in books
+                    ]
+                    list(pool.map(self.scrape_book, book_urls))
+
+                    # Checkpoint des stats une fois par page (~20 livres)
+                    self.save_checkpoint()
+                    self.print_stats()
+
+                    page += 1
+
         except KeyboardInterrupt:
             logger.info("Interruption detectee, sauvegarde en cours...")
             self.save_checkpoint()
@@ -230,8 +328,16 @@ class ResilientScraper:
             self.save_checkpoint()
             raise
         finally:
-            self.save_checkpoint()
+            # Arret propre du thread d'ecriture puis checkpoint final
+            # synchrone : rien ne doit rester en file a la sortie
+            self._save_q.put(None)
+            self._save_thread.join(timeout=5)
+            self._write_checkpoint({
+                'stats': self.stats,
+                'last_save': datetime.now().isoformat()
+            })
             self.save_results()
+            self._ckpt_fp.close()
     
     # Affichage des statistiques
     def print_stats(self):
@@ -258,11 +364,11 @@ class ResilientScraper:
     def save_results(self):
         output_file = f"books_scraped_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
         try:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump({
+            with open(output_file, 'wb') as f:
+                f.write(orjson.dumps({
                     'books': self.scraped_books,
                     'stats': self.stats
-                }, f, indent=2, ensure_ascii=False)
+                }, option=orjson.OPT_INDENT_2))
             logger.info(f"Resultats sauvegardes dans {output_file}")
         except Exception as e:
             logger.error(f"Erreur lors de la sauvegarde des resultats: {e}")
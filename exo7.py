@@ -1,7 +1,12 @@
-import requests
-from bs4 import BeautifulSoup
+import asyncio
+import httpx
+from bs4 import BeautifulSoup, SoupStrainer
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+from pyarrow import csv as pacsv
 import re
+import sys
 from urllib.parse import urljoin
 from typing import Dict, List, Tuple
 import logging
@@ -11,6 +16,24 @@ from datetime import datetime
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Seuls les blocs produit nous intéressent : le strainer limite la
+# construction de l'arbre bs4 à ces éléments au lieu d'allouer un Tag pour
+# chaque nœud de la page
+_STRAINER = SoupStrainer('article', class_='product_pod')
+
+# Regex compilées une seule fois au chargement du module : le nettoyage les
+# applique sur chaque ligne, autant éviter le passage par le cache de re
+_WS_RE = re.compile(r'\s+')
+_PRICE_RE = re.compile(r'([\d.]+)')
+_NUM_RE = re.compile(r'(\d+)')
+_URL_RE = re.compile(
+    r'^https?://'
+    r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'
+    r'localhost|'
+    r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'
+    r'(?::\d+)?'
+    r'(?:/?|[/?]\S+)$', re.IGNORECASE)
+
 # Pipeline complet de scraping et nettoyage des données
 class BooksScraperCleaner:
     
@@ -19,52 +42,97 @@ class BooksScraperCleaner:
         self.raw_data = []
         self.cleaned_data = []
         self.quality_report = {}
+        # Q3 des prix, calculé par _detect_anomalies et réutilisé par
+        # _cross_validate pour éviter de re-trier la même colonne
+        self._price_q3 = None
     
-    # Scraping avec gestion d'erreurs
+    # Parsing d'une page de catalogue (exécuté dans un thread pour ne pas
+    # bloquer la boucle asyncio pendant que les autres pages se téléchargent)
+    def _parse_page(self, content: bytes) -> List[Dict]:
+        # lxml parse en C, 5-10x plus vite que html.parser ; les bytes
+        # bruts lui laissent aussi la détection d'encodage
+        soup = BeautifulSoup(content, 'lxml', parse_only=_STRAINER)
+        books = soup.find_all('article', class_='product_pod')
+        return [self._extract_book_data(book) for book in books]
+
+    # Téléchargement + parsing d'une page, borné par le sémaphore
+    async def _scrape_page(self, client, sem, page: int, max_pages: int) -> List[Dict]:
+        url = f"{self.base_url}catalogue/page-{page}.html"
+        try:
+            async with sem:
+                response = await client.get(url)
+                response.raise_for_status()
+
+            books = await asyncio.to_thread(self._parse_page, response.content)
+            logger.info(f"Page {page}/{max_pages} scrapée: {len(books)} livres")
+            return books
+        except Exception as e:
+            logger.error(f"Erreur page {page}: {e}")
+            return []
+
+    # Les pages du catalogue sont indépendantes : elles sont téléchargées en
+    # parallèle, le coût passe de max_pages x RTT à ~1 RTT
+    async def _scrape_books_async(self, max_pages: int) -> List[Dict]:
+        sem = asyncio.Semaphore(10)
+
+        # Client partagé configuré explicitement : connexions keep-alive
+        # poolées, retries au niveau transport, et Accept-Encoding br/gzip
+        # (le HTML du catalogue se compresse ~8x, décompression en C)
+        limits = httpx.Limits(max_connections=10, max_keepalive_connections=10)
+        transport = httpx.AsyncHTTPTransport(retries=3)
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+            'Accept-Encoding': 'br, gzip'
+        }
+        async with httpx.AsyncClient(timeout=10, limits=limits,
+                                     transport=transport, headers=headers) as client:
+            pages = await asyncio.gather(*(
+                self._scrape_page(client, sem, page, max_pages)
+                for page in range(1, max_pages + 1)
+            ))
+
+        # gather restitue les pages dans l'ordre de soumission : les données
+        # restent dans le même ordre que le parcours séquentiel d'origine
+        for books in pages:
+            self.raw_data.extend(books)
+
+        return self.raw_data
+
+    # Scraping avec gestion d'erreurs (point d'entrée synchrone)
     def scrape_books(self, max_pages: int = 3) -> List[Dict]:
         logger.info(f"Début du scraping de {max_pages} pages...")
-        
-        for page in range(1, max_pages + 1):
-            url = f"{self.base_url}catalogue/page-{page}.html"
-            try:
-                response = requests.get(url, timeout=10)
-                response.encoding = 'utf-8'
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                books = soup.find_all('article', class_='product_pod')
-                
-                for book in books:
-                    book_data = self._extract_book_data(book)
-                    self.raw_data.append(book_data)
-                    
-                logger.info(f"Page {page}/{max_pages} scrapée: {len(books)} livres")
-                
-            except Exception as e:
-                logger.error(f"Erreur page {page}: {e}")
-                
+
+        result = asyncio.run(self._scrape_books_async(max_pages))
+
         logger.info(f"Total scraped: {len(self.raw_data)} livres")
-        return self.raw_data
+        return result
     
     # Extraction des données brutes
+    # Chaque find() parcourt le sous-arbre du livre : les balises sont
+    # cherchées une seule fois puis réutilisées (le h3 était traversé
+    # quatre fois, le prix et la disponibilité deux fois chacun)
     def _extract_book_data(self, book) -> Dict:
         try:
-            # Titre
-            title = book.find('h3').find('a')['title'] if book.find('h3') else None
-            
+            h3 = book.find('h3')
+            a = h3.find('a') if h3 else None
+
+            # Titre et URL depuis le même lien
+            title = a.get('title') if a else None
+            link = a.get('href') if a else None
+            full_url = urljoin(self.base_url, link) if link else None
+
             # Prix
-            price = book.find('p', class_='price_color').text if book.find('p', class_='price_color') else None
-            
+            price_tag = book.find('p', class_='price_color')
+            price = price_tag.text if price_tag else None
+
             # Disponibilité
-            availability = book.find('p', class_='instock availability').text.strip() if book.find('p', class_='instock availability') else None
-            
+            avail_tag = book.find('p', class_='instock availability')
+            availability = avail_tag.text.strip() if avail_tag else None
+
             # Rating
             rating_tag = book.find('p', class_='star-rating')
             rating = rating_tag['class'][1] if rating_tag and len(rating_tag['class']) > 1 else None
-            
-            # URL
-            link = book.find('h3').find('a')['href'] if book.find('h3') else None
-            full_url = urljoin(self.base_url, link) if link else None
-            
+
             return {
                 'title': title,
                 'price': price,
@@ -77,36 +145,71 @@ class BooksScraperCleaner:
             return {}
     
     # Nettoyage et validation des données
-    def clean_data(self) -> pd.DataFrame:
+    # strict_urls=True repasse par la regex RFC complète (utile pour des URLs
+    # étrangères) ; par défaut un startswith vectorisé suffit puisque toutes
+    # les URLs sortent de urljoin(self.base_url, ...)
+    def clean_data(self, strict_urls: bool = False) -> pd.DataFrame:
         logger.info("Début du nettoyage des données...")
         
-        df = pd.DataFrame(self.raw_data)
+        # Construction en un bloc avec colonnes explicites, puis dtypes
+        # dédiés : les colonnes texte sont adossées à Arrow (buffers UTF-8
+        # contigus, opérations .str en C sans indirection objet — et le
+        # chemin par défaut de pandas 3), et le rating devient un
+        # catégoriel à domaine fixe (codes entiers plutôt qu'objets str)
+        df = pd.DataFrame.from_records(
+            self.raw_data,
+            columns=['title', 'price', 'availability', 'rating', 'url']
+        )
+        df = df.astype({
+            'title': 'string[pyarrow]',
+            'price': 'string[pyarrow]',
+            'availability': 'string[pyarrow]',
+            'url': 'string[pyarrow]',
+            'rating': pd.CategoricalDtype(['One', 'Two', 'Three', 'Four', 'Five'])
+        })
         initial_rows = len(df)
         
-        # Nettoyage du titre
-        df['title_cleaned'] = df['title'].apply(self._clean_title)
-        
-        # Nettoyage du prix
-        df['price_numeric'] = df['price'].apply(self._clean_price)
-        
-        # Nettoyage de la disponibilité
-        df['stock_quantity'] = df['availability'].apply(self._clean_availability)
+        # Nettoyage du titre, vectorisé : espaces normalisés, trim puis
+        # capitalisation. Le round-trip encode/decode de l'ancienne version
+        # était un no-op (bs4 rend déjà de l'unicode propre) qui allouait
+        # deux buffers par ligne
+        df['title_cleaned'] = (
+            df['title'].fillna('')
+            .str.replace(_WS_RE, ' ', regex=True)
+            .str.strip()
+            .str.title()
+        )
+        
+        # Nettoyage du prix : extraction vectorisée du nombre, tout reste en C
+        # au lieu d'une boucle .apply cellule par cellule
+        df['price_numeric'] = df['price'].str.extract(_PRICE_RE, expand=False).astype(float)
+
+        # Nettoyage de la disponibilité : nombre si présent, sinon 1 pour un
+        # "In stock" sans quantité, sinon 0
+        stock = df['availability'].str.extract(_NUM_RE, expand=False).astype(float)
+        has_stock_text = df['availability'].str.contains('in stock', case=False, na=False)
+        # int32 suffit largement pour un stock ; int8 pour une note sur 5 :
+        # colonnes 2x/8x plus compactes que les int64 par défaut
+        df['stock_quantity'] = stock.fillna(has_stock_text.astype(int)).astype('int32')
         df['in_stock'] = df['stock_quantity'] > 0
-        
-        # Conversion du rating
-        df['rating_numeric'] = df['rating'].apply(self._convert_rating)
+
+        # Conversion du rating via les codes du catégoriel : les catégories
+        # sont déclarées dans l'ordre One..Five donc code+1 donne 1..5, et
+        # un rating absent ou hors vocabulaire (code -1) retombe sur 0
+        df['rating_numeric'] = (df['rating'].cat.codes.to_numpy() + 1).astype('int8')
         
         # Validation de l'URL
-        df['url_valid'] = df['url'].apply(self._validate_url)
-        
-        # Détection d'anomalies
-        df['is_anomaly'] = self._detect_anomalies(df)
-        
-        # Imputation des valeurs manquantes
-        df = self._impute_missing_values(df)
+        if strict_urls:
+            df['url_valid'] = df['url'].apply(self._validate_url)
+        else:
+            df['url_valid'] = (
+                df['url'].notna()
+                & df['url'].fillna('').str.startswith(self.base_url)
+            ).astype(bool)
         
-        # Validation croisée
-        df['data_coherent'] = self._cross_validate(df)
+        # Anomalies, imputation et validation croisée fusionnées : un seul
+        # passage sur les colonnes numériques
+        df = self._analyze_and_impute(df)
         
         self.cleaned_data = df
         
@@ -116,128 +219,61 @@ class BooksScraperCleaner:
         logger.info("Nettoyage terminé!")
         return df
     
-    # Fonctions de nettoyage du titre, prix, disponibilité, rating, URL
-    def _clean_title(self, title: str) -> str:
-        if pd.isna(title):
-            return ""
-        
-        # Suppression des espaces multiples et trim
-        title = re.sub(r'\s+', ' ', str(title)).strip()
-        
-        # Correction d'encodage basique
-        title = title.encode('utf-8', errors='ignore').decode('utf-8')
-        
-        # Capitalisation standardisée
-        return title.title() if title else ""
-    
-    def _clean_price(self, price: str) -> float:
-        if pd.isna(price):
-            return None
-        
-        try:
-            price_str = re.sub(r'[^\d.]', '', str(price))
-            return float(price_str) if price_str else None
-        except:
-            return None
-    
-    def _clean_availability(self, availability: str) -> int:
-        if pd.isna(availability):
-            return 0
-        
-        # Recherche d'un nombre dans le texte
-        match = re.search(r'(\d+)', str(availability))
-        if match:
-            return int(match.group(1))
-        
-        # Si "In stock" sans nombre, on considère qu'il y en a
-        if 'in stock' in str(availability).lower():
-            return 1
-        
-        return 0
-    
-    def _convert_rating(self, rating: str) -> int:
-        """Convertit le rating texte en nombre"""
-        rating_map = {
-            'One': 1, 'Two': 2, 'Three': 3, 'Four': 4, 'Five': 5
-        }
-        return rating_map.get(rating, 0)
-    
+    # Validation de l'URL
     def _validate_url(self, url: str) -> bool:
         if pd.isna(url):
             return False
-        
-        url_pattern = re.compile(
-            r'^https?://'  
-            r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'  
-            r'localhost|'  
-            r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  
-            r'(?::\d+)?'  
-            r'(?:/?|[/?]\S+)$', re.IGNORECASE)
-        
-        return bool(url_pattern.match(str(url)))
-    
-    # Détection d'anomalies
-    def _detect_anomalies(self, df: pd.DataFrame) -> pd.Series:
-        anomalies = pd.Series([False] * len(df), index=df.index)
-        
-        # Prix anormaux 
-        if 'price_numeric' in df.columns:
-            Q1 = df['price_numeric'].quantile(0.25)
-            Q3 = df['price_numeric'].quantile(0.75)
-            IQR = Q3 - Q1
-            lower_bound = Q1 - 3 * IQR
-            upper_bound = Q3 + 3 * IQR
-            
-            price_anomalies = (df['price_numeric'] < lower_bound) | (df['price_numeric'] > upper_bound)
-            anomalies |= price_anomalies
-        
-        # Titres vides ou trop courts
-        title_anomalies = df['title_cleaned'].str.len() < 3
-        anomalies |= title_anomalies
-        
-        # Rating invalide
-        rating_anomalies = (df['rating_numeric'] < 1) | (df['rating_numeric'] > 5)
-        anomalies |= rating_anomalies
-        
-        return anomalies
+
+        return bool(_URL_RE.match(str(url)))
     
-    # Impute valeurs manquantes
-    def _impute_missing_values(self, df: pd.DataFrame) -> pd.DataFrame:
-        
-        # Prix: utiliser la médiane
-        if 'price_numeric' in df.columns:
-            median_price = df['price_numeric'].median()
-            df['price_numeric'].fillna(median_price, inplace=True)
-            df['price_imputed'] = df['price'].isna()
-        
-        # Rating: utiliser le mode (rating le plus fréquent)
-        if 'rating_numeric' in df.columns:
-            mode_rating = df['rating_numeric'].mode()[0] if not df['rating_numeric'].mode().empty else 3
-            df['rating_numeric'].fillna(mode_rating, inplace=True)
-            df['rating_imputed'] = df['rating'].isna()
-        
-        # Stock: 0 par défaut
-        if 'stock_quantity' in df.columns:
-            df['stock_quantity'].fillna(0, inplace=True)
-        
+    # Détection d'anomalies, imputation et validation croisée fusionnées
+    # Chaque helper rescannait le DataFrame de bout en bout ; ici les
+    # colonnes sont extraites une fois en ndarray et toutes les règles se
+    # calculent dessus — chaque colonne n'est lue qu'une fois en mémoire
+    def _analyze_and_impute(self, df: pd.DataFrame) -> pd.DataFrame:
+        price = df['price_numeric'].to_numpy(dtype=float)
+        rating = df['rating_numeric'].to_numpy()
+        title_len = df['title_cleaned'].str.len().to_numpy(dtype=int)
+        in_stock = df['in_stock'].to_numpy(dtype=bool)
+        url_valid = df['url_valid'].to_numpy(dtype=bool)
+
+        # Les deux quantiles sortent d'un seul appel nanpercentile ; Q3 est
+        # partagé avec la règle de cohérence prix/rating
+        Q1, Q3 = np.nanpercentile(price, [25, 75])
+        IQR = Q3 - Q1
+        self._price_q3 = Q3
+
+        # Anomalies : prix hors bornes IQR, titre vide/trop court, rating
+        # hors échelle — une seule expression booléenne
+        df['is_anomaly'] = (
+            (price < Q1 - 3 * IQR) | (price > Q3 + 3 * IQR)
+            | (title_len < 3)
+            | (rating < 1) | (rating > 5)
+        )
+
+        # Imputation du prix par la médiane (sur les valeurs déjà extraites)
+        price_missing = np.isnan(price)
+        df['price_imputed'] = price_missing
+        if price_missing.any():
+            df['price_numeric'] = np.where(price_missing, np.nanmedian(price), price)
+
+        # Imputation du rating par le mode (0 = valeur sentinelle du map)
+        rating_missing = rating == 0
+        df['rating_imputed'] = rating_missing
+        if rating_missing.any():
+            rated = rating[~rating_missing]
+            mode_rating = np.bincount(rated).argmax() if rated.size else 3
+            df['rating_numeric'] = np.where(rating_missing, mode_rating, rating).astype('int8')
+
+        # Cohérence : les livres chers devraient avoir de bons ratings, et
+        # une URL valide devrait correspondre à un livre en stock
+        df['data_coherent'] = (
+            ~((price > Q3) & (rating <= 2))
+            & ~(url_valid & ~in_stock)
+        )
+
         return df
     
-    # Validation croisée des données
-    def _cross_validate(self, df: pd.DataFrame) -> pd.Series:
-        coherent = pd.Series([True] * len(df), index=df.index)
-        
-        # Cohérence prix/rating: les livres chers devraient avoir de bons ratings
-        if 'price_numeric' in df.columns and 'rating_numeric' in df.columns:
-            expensive_books = df['price_numeric'] > df['price_numeric'].quantile(0.75)
-            low_rating = df['rating_numeric'] <= 2
-            coherent &= ~(expensive_books & low_rating)
-        
-        # Cohérence disponibilité/URL: si URL valide, devrait être en stock
-        if 'url_valid' in df.columns and 'in_stock' in df.columns:
-            coherent &= ~(df['url_valid'] & ~df['in_stock'])
-        
-        return coherent
-    
     # Génération du rapport de qualité
     def _generate_quality_report(self, df: pd.DataFrame, initial_rows: int) -> Dict:
         
@@ -297,52 +333,60 @@ class BooksScraperCleaner:
         
         return report
     
-    # Affichage lisible du rapport 
+    # Affichage lisible du rapport
     def print_quality_report(self):
         """Affiche le rapport de qualité de manière lisible"""
-        print("\n" + "="*60)
-        print("RAPPORT DE QUALITÉ DES DONNÉES")
-        print("="*60)
-        
-        print(f"\nDate: {self.quality_report['timestamp']}")
-        print(f"\nVOLUME")
-        print(f"  • Lignes initiales: {self.quality_report['rows_initial']}")
-        print(f"  • Lignes finales: {self.quality_report['rows_final']}")
-        print(f"  • Lignes perdues: {self.quality_report['rows_lost']}")
-        
-        print(f"\nCOMPLÉTUDE")
-        for field, pct in self.quality_report['completeness'].items():
-            print(f"  • {field}: {pct}")
-        
-        print(f"\nVALIDITÉ")
-        print(f"  • URLs valides: {self.quality_report['validity']['url_valid_count']} ({self.quality_report['validity']['url_valid_pct']})")
-        
-        print(f"\n ANOMALIES")
-        print(f"  • Détectées: {self.quality_report['anomalies']['count']} ({self.quality_report['anomalies']['percentage']})")
-        
-        print(f"\nIMPUTATION")
-        for field, count in self.quality_report['imputation'].items():
-            print(f"  • {field}: {count}")
-        
-        print(f"\nSTATISTIQUES")
-        if 'price' in self.quality_report['statistics']:
-            print(f"  Prix:")
-            for stat, val in self.quality_report['statistics']['price'].items():
-                print(f"    - {stat}: {val}")
-        
-        if 'rating' in self.quality_report['statistics']:
-            print(f"  Ratings:")
-            print(f"    - Moyenne: {self.quality_report['statistics']['rating']['mean']}")
-        
-        print(f"\n✔️  COHÉRENCE")
-        print(f"  • Lignes cohérentes: {self.quality_report['coherence']['coherent_rows']} ({self.quality_report['coherence']['coherence_rate']})")
-        
-        print("\n" + "="*60 + "\n")
+        # Le rapport est assemblé en mémoire puis émis en une seule écriture,
+        # au lieu d'une quarantaine de print() (un syscall chacun sur un tty)
+        report = self.quality_report
+        lines = ["\n" + "="*60,
+                 "RAPPORT DE QUALITÉ DES DONNÉES",
+                 "="*60]
+
+        lines.append(f"\nDate: {report['timestamp']}")
+        lines.append("\nVOLUME")
+        lines.append(f"  • Lignes initiales: {report['rows_initial']}")
+        lines.append(f"  • Lignes finales: {report['rows_final']}")
+        lines.append(f"  • Lignes perdues: {report['rows_lost']}")
+
+        lines.append("\nCOMPLÉTUDE")
+        for field, pct in report['completeness'].items():
+            lines.append(f"  • {field}: {pct}")
+
+        lines.append("\nVALIDITÉ")
+        lines.append(f"  • URLs valides: {report['validity']['url_valid_count']} ({report['validity']['url_valid_pct']})")
+
+        lines.append("\n ANOMALIES")
+        lines.append(f"  • Détectées: {report['anomalies']['count']} ({report['anomalies']['percentage']})")
+
+        lines.append("\nIMPUTATION")
+        for field, count in report['imputation'].items():
+            lines.append(f"  • {field}: {count}")
+
+        lines.append("\nSTATISTIQUES")
+        if 'price' in report['statistics']:
+            lines.append("  Prix:")
+            for stat, val in report['statistics']['price'].items():
+                lines.append(f"    - {stat}: {val}")
+
+        if 'rating' in report['statistics']:
+            lines.append("  Ratings:")
+            lines.append(f"    - Moyenne: {report['statistics']['rating']['mean']}")
+
+        lines.append("\n✔️  COHÉRENCE")
+        lines.append(f"  • Lignes cohérentes: {report['coherence']['coherent_rows']} ({report['coherence']['coherence_rate']})")
+
+        lines.append("\n" + "="*60 + "\n")
+
+        sys.stdout.write('\n'.join(lines) + '\n')
     
     # Export des résultats nettoyés
+    # L'écrivain CSV d'Arrow encode colonne par colonne en C (et en
+    # parallèle), là où df.to_csv formate les lignes une à une en Python
     def export_results(self, filename: str = 'books_cleaned.csv'):
         if len(self.cleaned_data) > 0:
-            self.cleaned_data.to_csv(filename, index=False, encoding='utf-8')
+            table = pa.Table.from_pandas(self.cleaned_data, preserve_index=False)
+            pacsv.write_csv(table, filename)
             logger.info(f"Données exportées vers {filename}")
         else:
             logger.warning("Aucune donnée à exporter")
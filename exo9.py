@@ -1,7 +1,7 @@
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from typing import Optional, Dict
-import json
+import orjson
 import time
 from datetime import datetime, timedelta
 import os
@@ -18,23 +18,28 @@ class AuthenticatedScraper:
         self.is_authenticated = False
         self.session_expiry = None
         self.credentials_file = Path("credentials.json")
+        # Cache memoire des credentials : refresh_session peut etre appele
+        # a repetition, inutile de relire le fichier a chaque expiration
+        self._creds_cache = None
     
     # Méthode interne pour récupérer le token CSRF
     def _get_csrf_token(self, url: str) -> Optional[str]:
         try:
             response = self.session.get(url)
-            soup = BeautifulSoup(response.text, 'html.parser')
+            # lxml parse en C ; les bytes bruts évitent un décodage Python.
+            # Le token vit dans un input ou un meta : le strainer limite
+            # l'arbre a ces deux types de balises
+            soup = BeautifulSoup(response.content, 'lxml',
+                                 parse_only=SoupStrainer(['input', 'meta']))
             
-            # Cherche le token CSRF dans les inputs cachés
-            csrf_input = soup.find('input', {'name': 'csrf_token'})
-            if csrf_input:
-                return csrf_input.get('value')
-            
-            # Alternative : cherche dans les meta tags
-            csrf_meta = soup.find('meta', {'name': 'csrf-token'})
-            if csrf_meta:
-                return csrf_meta.get('content')
-                
+            # Un seul parcours de l'arbre pour les deux variantes du token
+            # (input cache ou meta tag), au lieu de deux passes find()
+            for tag in soup.find_all(['input', 'meta']):
+                if tag.name == 'input' and tag.get('name') == 'csrf_token':
+                    return tag.get('value')
+                if tag.name == 'meta' and tag.get('name') == 'csrf-token':
+                    return tag.get('content')
+
             return None
         except Exception as e:
             print(f"Erreur lors de la récupération du CSRF token: {e}")
@@ -47,25 +52,30 @@ class AuthenticatedScraper:
             'password': password 
         }
         
-        with open(self.credentials_file, 'w') as f:
-            json.dump(credentials, f)
-        
+        self.credentials_file.write_bytes(orjson.dumps(credentials))
+        # Le cache reflete immediatement la nouvelle valeur
+        self._creds_cache = dict(credentials)
+
         # Restreint les permissions du fichier (Unix)
         try:
             os.chmod(self.credentials_file, 0o600)
         except:
             pass
-        
+
         print("Credentials sauvegardés (chiffrer en production)")
     
-    # Méthode pour charger les credentials
+    # Méthode pour charger les credentials (depuis le cache apres la
+    # premiere lecture)
     def load_credentials(self) -> Optional[Dict[str, str]]:
+        if self._creds_cache is not None:
+            return self._creds_cache
+
         if not self.credentials_file.exists():
             return None
-        
+
         try:
-            with open(self.credentials_file, 'r') as f:
-                return json.load(f)
+            self._creds_cache = orjson.loads(self.credentials_file.read_bytes())
+            return self._creds_cache
         except Exception as e:
             print(f"Erreur lors du chargement des credentials: {e}")
             return None
@@ -115,7 +125,9 @@ class AuthenticatedScraper:
                 return True
             else:
                 print("Échec de l'authentification")
-                soup = BeautifulSoup(response.text, 'html.parser')
+                # Seul le div d'erreur nous interesse sur cette page
+                soup = BeautifulSoup(response.content, 'lxml',
+                                     parse_only=SoupStrainer('div', class_='error'))
                 error = soup.find('div', class_='error')
                 if error:
                     print(f"   Erreur: {error.text.strip()}")
@@ -186,19 +198,21 @@ class AuthenticatedScraper:
                 else:
                     return None
             
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Extrait les citations
+            soup = BeautifulSoup(response.content, 'lxml')
+
+            # Extrait les citations : selecteurs CSS (soupsieve compile et
+            # cache le pattern) et .string sur les balises a nœud texte
+            # unique, au lieu de trois parcours find() par citation
             quotes = []
-            for quote_div in soup.find_all('div', class_='quote'):
-                text = quote_div.find('span', class_='text')
-                author = quote_div.find('small', class_='author')
-                tags = [tag.text for tag in quote_div.find_all('a', class_='tag')]
-                
+            for quote_div in soup.select('div.quote'):
+                text = quote_div.select_one('span.text')
+                author = quote_div.select_one('small.author')
+                tags = [tag.string for tag in quote_div.select('a.tag')]
+
                 if text and author:
                     quotes.append({
-                        'text': text.text.strip(),
-                        'author': author.text.strip(),
+                        'text': text.string.strip(),
+                        'author': author.string.strip(),
                         'tags': tags
                     })
             
@@ -221,17 +235,17 @@ class AuthenticatedScraper:
             for cookie in self.session.cookies
         }
         
-        with open(filename, 'w') as f:
-            json.dump(cookies_dict, f, indent=2)
-        
+        # orjson encode en C et rend des bytes : un seul write binaire,
+        # sans le formateur indent pur Python de json.dump
+        Path(filename).write_bytes(orjson.dumps(cookies_dict, option=orjson.OPT_INDENT_2))
+
         print(f"Cookies exportés vers {filename}")
     
     # Méthode pour importer les cookies
     def import_cookies(self, filename: str = "cookies.json"):
         try:
-            with open(filename, 'r') as f:
-                cookies_dict = json.load(f)
-            
+            cookies_dict = orjson.loads(Path(filename).read_bytes())
+
             for name, cookie_data in cookies_dict.items():
                 self.session.cookies.set(
                     name=name,